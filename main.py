@@ -2,7 +2,10 @@
 Main module, gets run on boot by the pico.
 """
 
-from machine import Timer
+from array import array
+
+from machine import WDT, Timer
+from micropython import const
 
 from tesla_cooler import thermistor
 from tesla_cooler.cooler_fan_manager import CoolerFanManager
@@ -11,7 +14,8 @@ from tesla_cooler.fan_constants import (
     GM1204PQV1_8A_SHORT_WIRE,
     FanConstants,
 )
-from tesla_cooler.gpu_temperature_to_cooler_power import gpu_temperature_to_cooler_power
+from tesla_cooler.gpu_temperature_to_cooler_power import cooler_power_curve
+from tesla_cooler.linear_interpolate import interpolate_position, sorted_position
 from tesla_cooler.pcb_constants import (
     COOLER_A_FAN_PINS,
     COOLER_A_THERMISTOR,
@@ -20,96 +24,213 @@ from tesla_cooler.pcb_constants import (
 )
 
 try:
-    from typing import Callable, Dict, List, Tuple  # pylint: disable=unused-import
+    from typing import Callable, Dict, List, Optional, Tuple  # pylint: disable=unused-import
 except ImportError:
     pass  # we're probably on the pico if this occurs.
 
 
-LOG_MSG = (
-    "Cooler (thermistor, calc): {name} is {temperature} degrees C. "
-    "Cooler Power: {power}, Target Counts: {target_counts}, Setting fans: {duty_cycles}"
+# Literal chunks of the log line, printed around the values so no template has to be parsed.
+_LOG_PARTS = (
+    "Cooler (thermistor, calc): ",
+    " is ",
+    " degrees C. Cooler Power: ",
+    ", Target Counts: ",
+    ", Setting fans: ",
 )
 
-DEFAULT_SPEEDS_PER_POWER = 30
+# If 1, each time a cooler updates its fans a log will be printed to the console. Makes it hard to
+# work in a repl alongside operation but good for debugging otherwise. Being a `const`, the compiler
+# drops the logging code entirely when this is 0.
+PRINT_ACTIVITY = const(0)
 
 # How often the cooler control loops will run.
-DEFAULT_COOLER_UPDATE_MS = 5000
-
-
-def create_cooler_callback(
-    cooler_name: str,
-    thermistor_pin: int,
-    fan_pins: Tuple[int, ...],
-    fan_constants: FanConstants,
-    resistance_to_temperature: Dict[float, float],
-    temperature_offset: float,
-    print_activity: bool = False,
-) -> Callable[[Timer], None]:
+DEFAULT_COOLER_UPDATE_MS = const(5000)
+
+# (name, thermistor pin, fan pins, fan constants, temperature offset) for each cooler in the build.
+# Temperature offsets were determined experimentally.
+COOLERS = (
+    # "Hot side" GPU -- The underside of the card is right up against the other GPU
+    ("A", COOLER_A_THERMISTOR, COOLER_A_FAN_PINS, GM1204PQV1_8A_SHORT_WIRE, 5),
+    # "Cool side" GPU -- The underside of the card faces the motherboard and has plenty of room.
+    ("B", COOLER_B_THERMISTOR, COOLER_B_FAN_PINS, GM1204PQV1_8A_LONG_WIRE, 30),
+)
+
+# Fans are only re-driven once the temperature has moved at least this many degrees C away from the
+# temperature they were last set for.
+TEMPERATURE_HYSTERESIS = 0.5
+
+# The watchdog is fed once per full pass over the coolers, plus some headroom for timer jitter.
+# Cold starting fans doesn't block the timer. The RP2040 can't wait longer than 8388ms.
+WATCHDOG_TIMEOUT_MS = const(DEFAULT_COOLER_UPDATE_MS + 1000)
+
+
+class Cooler:  # pylint: disable=too-few-public-methods,too-many-instance-attributes
     """
-    Creates a function to be called by the timer.
-    :param cooler_name: For logging.
-    :param thermistor_pin: Temp values from this pin will feed into fan speed.
-    :param fan_pins: These fans will be driven.
-    :param fan_constants: Contains information on electrical properties of the fan. See the
-    docs in the type for more.
-    :param resistance_to_temperature: A dictionary mapping electrical resistance to the
-    corresponding temperature of a resistor. Used to figure out what temperature the GPU is.
-    :param temperature_offset: The difference between the temperature of the thermistor, and the
-    temperature of the GPU. Since the thermistor is attached to the outside of the GPU, it will
-    always have slightly different temperature than that measured by `nvidia-smi`.
-    TODO: This assumes the relationship is linear which it probably isn't.
-    :param print_activity: If True, each time the timer runs a log will be printed to the console.
-    Makes it hard to work in a repl alongside operation but good for debugging otherwise.
-    :return: None
+    Controls a single cooler: reads its thermistor and drives its fans.
+    The `tick` bound method is handed to the timer directly, so the per-cooler state lives on the
+    instance rather than in the cells of a closure.
     """
 
-    cooler_fan_manager = CoolerFanManager(
-        pin_numbers=fan_pins, fan_constants=fan_constants, speeds_per_power=DEFAULT_SPEEDS_PER_POWER
-    )
+    def __init__(  # pylint: disable=too-many-arguments
+        self: "Cooler",
+        cooler_name: str,
+        thermistor_pin: int,
+        fan_pins: Tuple[int, ...],
+        fan_constants: FanConstants,
+        resistance_to_temperature: Tuple["array[float]", "array[float]"],
+        temperature_offset: float,
+    ):
+        """
+        :param cooler_name: For logging.
+        :param thermistor_pin: Temp values from this pin will feed into fan speed.
+        :param fan_pins: These fans will be driven.
+        :param fan_constants: Contains information on electrical properties of the fan. See the
+        docs in the type for more.
+        :param resistance_to_temperature: Parallel arrays of sorted electrical resistances and the
+        corresponding temperatures of a resistor. Used to figure out what temperature the GPU is.
+        :param temperature_offset: The difference between the temperature of the thermistor, and
+        the temperature of the GPU. Since the thermistor is attached to the outside of the GPU, it
+        will always have slightly different temperature than that measured by `nvidia-smi`.
+        TODO: This assumes the relationship is linear which it probably isn't.
+        """
+
+        self._cooler_name = cooler_name
+        self._read_resistance = thermistor.thermistor_resistance(pin_number=thermistor_pin)
+        self._resistances, self._temperatures = resistance_to_temperature
+        self._temperature_offset = temperature_offset
+        self._last_set_temperature: Optional[float] = None
 
-    def cooler_callback(timer: Timer) -> None:  # pylint: disable=unused-argument
+        # The cooler power for each of the temperatures in the lookup. The power curve is linear
+        # between whole degrees, so as long as `temperature_offset` is a whole number, interpolating
+        # this table gives the same result as evaluating the curve.
+        gpu_temperature_to_power = cooler_power_curve()
+        self._powers = array(
+            "f",
+            [
+                gpu_temperature_to_power(temperature + temperature_offset)
+                for temperature in self._temperatures
+            ],
+        )
+
+        self._fan_manager = CoolerFanManager(
+            pin_numbers=fan_pins,
+            fan_constants=fan_constants,
+        )
+
+        # Bound once here so each tick doesn't need to look the method up on the manager.
+        self._set_fan_power = self._fan_manager.power
+
+    def tick(self: "Cooler", timer: Timer) -> None:  # pylint: disable=unused-argument
         """
-        This function will be called by the timer. This function does the following:
-        1. Read the current temperature off of the thermistor.
-        2. Converts that current temperature to cooler power.
+        This method will be called by the timer. This method does the following:
+        1. Read the current temperature off of the thermistor. If it's within
+        `TEMPERATURE_HYSTERESIS` of the temperature the fans were last set for, and none of the
+        fans are still being cold started, stop here.
+        2. Converts that current temperature to cooler power using the precomputed table.
         3. Converts cooler power into the actual PWM duty cycle values to be written to the fans
         and actually writes the values to the fans.
-        4. Logs status (if configured)
+        4. Logs status (if `PRINT_ACTIVITY` is set)
         :param timer: Provided by the timer interface but not consumed.
         :return: None
         """
 
-        thermistor_temperature = thermistor.thermistor_temperature(
-            pin_number=thermistor_pin, resistance_to_temperature=resistance_to_temperature
-        )
+        # Search the lookup once, then re-use the position for both of the parallel tables.
+        position = sorted_position(self._read_resistance(), self._resistances)
+
+        thermistor_temperature = interpolate_position(position, self._temperatures)
+
+        last_set_temperature = self._last_set_temperature
+        if (
+            last_set_temperature is not None
+            and not self._fan_manager.warming()
+            and abs(thermistor_temperature - last_set_temperature) < TEMPERATURE_HYSTERESIS
+        ):
+            return
 
-        current_gpu_temperature = thermistor_temperature + temperature_offset
+        current_gpu_temperature = thermistor_temperature + self._temperature_offset
 
-        cooler_power = gpu_temperature_to_cooler_power(gpu_temperature=current_gpu_temperature)
-        target_counts, fan_speeds = cooler_fan_manager.power(cooler_power)
+        cooler_power = interpolate_position(position, self._powers)
+        target_counts, fan_speeds = self._set_fan_power(cooler_power)
+        self._last_set_temperature = thermistor_temperature
 
-        if print_activity:
+        if PRINT_ACTIVITY:
             print(
-                LOG_MSG.format(
-                    name=cooler_name,
-                    temperature=(thermistor_temperature, current_gpu_temperature),
-                    power=cooler_power,
-                    target_counts=target_counts,
-                    duty_cycles=fan_speeds,
-                )
+                _LOG_PARTS[0],
+                self._cooler_name,
+                _LOG_PARTS[1],
+                (thermistor_temperature, current_gpu_temperature),
+                _LOG_PARTS[2],
+                cooler_power,
+                _LOG_PARTS[3],
+                target_counts,
+                _LOG_PARTS[4],
+                fan_speeds,
+                sep="",
             )
 
-    return cooler_callback
+
+class CoolerScheduler:  # pylint: disable=too-few-public-methods
+    """
+    Runs a group of coolers off of a single timer. Each time the timer fires the next cooler in
+    the group is updated. The watchdog is fed once per full pass, and only if every cooler was
+    updated successfully during that pass, so one working cooler can't keep the pico alive while
+    the other is failing.
+    """
+
+    def __init__(self: "CoolerScheduler", coolers: Tuple[Cooler, ...]):
+        """
+        :param coolers: The coolers to update, in order.
+        """
+
+        self._coolers = coolers
+        self._phase = 0
+
+        # Bit `n` is set once the cooler at index `n` has been updated without an exception.
+        self._updated = 0
+        self._all_updated = (1 << len(coolers)) - 1
+
+        # There is only ever a single watchdog, started after the first full pass.
+        self._watchdog: Optional[WDT] = None
+
+    def tick(self: "CoolerScheduler", timer: Timer) -> None:
+        """
+        This method will be called by the timer. Updates the cooler whose turn it is, and feeds the
+        watchdog after a full pass. The watchdog is only started after the first full pass, so
+        the time spent setting up can't trip it.
+        If a cooler raises, the exception still propagates but the next tick moves on to the next
+        cooler, and the watchdog won't be fed.
+        :param timer: Passed along to the cooler.
+        :return: None
+        """
+
+        phase = self._phase
+
+        try:
+            self._coolers[phase].tick(timer)
+            self._updated |= 1 << phase
+        finally:
+            # Done even if the cooler raised, so a failed pass is always closed out and can't
+            # count towards the next one.
+            phase = (phase + 1) % len(self._coolers)
+            self._phase = phase
+
+            if phase == 0:
+                if self._updated == self._all_updated:
+                    if self._watchdog is None:
+                        self._watchdog = WDT(timeout=WATCHDOG_TIMEOUT_MS)
+                    self._watchdog.feed()
+                self._updated = 0
 
 
 def main() -> None:
     """
     Main entry point for tesla_cooler.
     This is very specific to my build, if you're adapting this for another configuration,
-    you're probably going to want to edit this function.
+    you're probably going to want to edit `COOLERS` and this function.
 
     Timers:
-        Attaches the two cooler control loops to timers so they can run in parallel.
+        Creates a cooler for each entry in `COOLERS` and attaches them to a single timer which
+        alternates between them, and feeds a watchdog once each of them has run successfully.
         Because this function is non-blocking, you can REPL into the pico and interact with it while
         the coolers are running.
 
@@ -118,35 +239,26 @@ def main() -> None:
 
     resistance_to_temperature = thermistor.read_resistance_to_temperature()
 
-    # "Hot side" GPU -- The underside of the card is right up against the other GPU
-    Timer().init(
-        period=DEFAULT_COOLER_UPDATE_MS,
-        mode=Timer.PERIODIC,
-        callback=create_cooler_callback(
-            cooler_name="A",
-            thermistor_pin=COOLER_A_THERMISTOR,
-            fan_pins=COOLER_A_FAN_PINS,
-            fan_constants=GM1204PQV1_8A_SHORT_WIRE,
+    coolers = tuple(
+        Cooler(
+            cooler_name=cooler_name,
+            thermistor_pin=thermistor_pin,
+            fan_pins=fan_pins,
+            fan_constants=fan_constants,
             resistance_to_temperature=resistance_to_temperature,
-            temperature_offset=5,  # determined experimentally
-        ),
+            temperature_offset=temperature_offset,
+        )
+        for cooler_name, thermistor_pin, fan_pins, fan_constants, temperature_offset in COOLERS
     )
 
-    # "Cool side" GPU -- The underside of the card faces the motherboard and has plenty of room.
+    # Each cooler gets its own slot within the update period.
     Timer().init(
-        period=DEFAULT_COOLER_UPDATE_MS,
+        period=DEFAULT_COOLER_UPDATE_MS // len(coolers),
         mode=Timer.PERIODIC,
-        callback=create_cooler_callback(
-            cooler_name="B",
-            thermistor_pin=COOLER_B_THERMISTOR,
-            fan_pins=COOLER_B_FAN_PINS,
-            fan_constants=GM1204PQV1_8A_LONG_WIRE,
-            resistance_to_temperature=resistance_to_temperature,
-            temperature_offset=30,  # determined experimentally
-        ),
+        callback=CoolerScheduler(coolers=coolers).tick,
     )
 
-    print("Timers configured!")
+    print("Timer configured!")
 
 
 if __name__ == "__main__":
@@ -3,8 +3,12 @@ Functions for controlling the speed of fans.
 TODO: add more docs here
 """
 
+from array import array
+
+import micropython
 import utime
 from machine import PWM, Pin
+from micropython import const
 
 from tesla_cooler.fan_constants import FanConstants
 from tesla_cooler.fan_speed_control import fan_drive_values
@@ -14,27 +18,20 @@ try:
 except ImportError:
     pass  # we're probably on the pico if this occurs.
 
+# `power` is quantized to this many steps between 0 and 1 when looking up fan speeds.
+DEFAULT_POWER_STEPS = const(200)
 
-def set_fan_to_duty(pwm_pin: PWM, duty: int, min_cold_start_duty: int) -> None:
-    """
-    Write the pwm pin to the given duty cycle.
-    :param pwm_pin: Pin to modify.
-    :param duty: Target duty cycle.
-    :param min_cold_start_duty: Slowest speed the fan can reliably spin to after starting.
-    :return: None
-    """
-
-    current_fan_duty = pwm_pin.duty_u16()
 
-    if all([current_fan_duty == 0, duty != 0, duty < min_cold_start_duty]):
-        pwm_pin.duty_u16(min_cold_start_duty)
-        utime.sleep(1)
-        # Fan should now be spinning and can reach lower RPMs without stalling.
+# How long a stopped fan is held at `min_cold_start_duty` before it is allowed to slow down.
+COLD_START_MS = const(1000)
 
-    pwm_pin.duty_u16(duty)
+# The states each of the fans can be in.
+FAN_STOPPED = const(0)
+FAN_WARMING = const(1)  # Being held at `min_cold_start_duty` until it is spinning.
+FAN_RUNNING = const(2)
 
 
-class CoolerFanManager:  # pylint: disable=too-few-public-methods
+class CoolerFanManager:  # pylint: disable=too-few-public-methods,too-many-instance-attributes
     """
     Manages a single cooler's group of fans.
 
@@ -55,13 +52,13 @@ class CoolerFanManager:  # pylint: disable=too-few-public-methods
         self: "CoolerFanManager",
         pin_numbers: Tuple[int, ...],
         fan_constants: FanConstants,
-        speeds_per_power: int,
+        power_steps: int = DEFAULT_POWER_STEPS,
     ):
         """
         :param pin_numbers: Locations of the mosfets that control the fans.
         :param fan_constants: Contains info about the fans that are attached.
-        :param speeds_per_power: For a given power setting, decides the number of potential
-        speed values that can be used.
+        :param power_steps: The resolution of the power to fan speed lookup table. The speeds for
+        `power_steps + 1` evenly spaced powers between 0 and 1 are computed up front.
         """
 
         def setup_pwm(pin_number: int) -> PWM:
@@ -72,35 +69,108 @@ class CoolerFanManager:  # pylint: disable=too-few-public-methods
             """
             pwm = PWM(Pin(pin_number))
             pwm.freq(fan_constants.pwm_freq)
+            pwm.duty_u16(0)
             return pwm
 
-        self._pwm_controllers: List[PWM] = [setup_pwm(pin_number) for pin_number in pin_numbers]
+        self._pwm_controllers: Tuple[PWM, ...] = tuple(
+            setup_pwm(pin_number) for pin_number in pin_numbers
+        )
         self._fan_constants = fan_constants
-        self._speeds_per_power = speeds_per_power
+        self._power_steps = power_steps
+
+        num_fans = len(pin_numbers)
+
+        # Computing the fan speeds for a given power is too slow to do every tick, so it is done
+        # once for every possible step of power here. Speeds for step `n` are stored flat at
+        # `n * num_fans` through `(n + 1) * num_fans`.
+        self._target_counts = array("L", [0] * (power_steps + 1))
+        self._speeds = array("H", [0] * ((power_steps + 1) * num_fans))
+        for step in range(power_steps + 1):
+            target_counts, speeds = fan_drive_values(
+                power=step / power_steps,
+                num_fans=num_fans,
+                output_ranges=fan_constants.duty_ranges,
+            )
+            self._target_counts[step] = target_counts
+            for fan_index, speed in enumerate(speeds):
+                self._speeds[step * num_fans + fan_index] = speed
+
+        # The duty cycles last written to each of `_pwm_controllers`, so unchanged duty cycles
+        # don't need to be written again. Also used to report the duty cycles from `power`.
+        self._duty_cycles = array("H", [0] * num_fans)
+
+        # Cold starting is tracked per fan rather than blocking until the fan is spinning. See
+        # `FAN_STOPPED` etc. for the states, and `COLD_START_MS`.
+        self._fan_states = bytearray(num_fans)
+        self._warm_until = array("L", [0] * num_fans)
+        self._num_warming = 0
 
-    def power(self: "CoolerFanManager", new_power: float) -> Tuple[int, Tuple[int, ...]]:
+    def warming(self: "CoolerFanManager") -> bool:
+        """
+        Fans that are being cold started are left at `min_cold_start_duty` until the next call to
+        `power` after `COLD_START_MS` has passed.
+        :return: True if any of the fans are still being cold started.
+        """
+        return self._num_warming > 0
+
+    @micropython.native
+    def power(  # pylint: disable=too-many-locals
+        self: "CoolerFanManager", new_power: float
+    ) -> Tuple[int, "array[int]"]:
         """
         Set the attached fans to the given power. Logic under the hood decides how that actually
         translates to rotational speed of each of the fans, see `fan_drive_values` for more
         details.
+        Fans that are stopped and asked to spin slower than `min_cold_start_duty` are held at that
+        duty cycle first, see `warming`. Nothing blocks while that happens.
         :param new_power: Float between 0 and 1. 0 maps to a single fan spinning as slowly as
-        possible, 1 maps to all fans spinning as fast as possible.
-        :return: The speeds that were written to the pins.
+        possible, 1 maps to all fans spinning as fast as possible. Rounded to the nearest of the
+        `power_steps` that were precomputed.
+        :return: The target counts, and the speeds the pins are now set to. The array of speeds is
+        owned by the manager and is overwritten by the next call.
         """
 
-        # This resulting tuple is going to be sorted fastest speed to slowest speed.
-        target_counts, speeds = fan_drive_values(
-            power=new_power,
-            num_fans=len(self._pwm_controllers),
-            output_ranges=self._fan_constants.duty_ranges,
-            num_speeds=self._speeds_per_power,
-        )
-
-        for pwm_pin, speed in zip(self._pwm_controllers, speeds):
-            set_fan_to_duty(
-                pwm_pin=pwm_pin,
-                duty=speed,
-                min_cold_start_duty=self._fan_constants.min_cold_start_duty,
-            )
-
-        return target_counts, speeds
+        step = min(max(int(new_power * self._power_steps + 0.5), 0), self._power_steps)
+        num_fans = len(self._pwm_controllers)
+        offset = step * num_fans
+        speeds = self._speeds
+
+        duty_cycles = self._duty_cycles
+        fan_states = self._fan_states
+        warm_until = self._warm_until
+        min_cold_start_duty = self._fan_constants.min_cold_start_duty
+        now = utime.ticks_ms()
+        num_warming = 0
+
+        for index, pwm_pin in enumerate(self._pwm_controllers):
+            speed = speeds[offset + index]
+            state = fan_states[index]
+
+            if speed == 0:
+                state = FAN_STOPPED
+            elif state == FAN_STOPPED and speed < min_cold_start_duty:
+                # Fan can't start at this speed. Spin it up first, it can slow down once spinning.
+                speed = min_cold_start_duty
+                warm_until[index] = utime.ticks_add(now, COLD_START_MS)
+                state = FAN_WARMING
+            elif (
+                state == FAN_WARMING
+                and speed < min_cold_start_duty
+                and utime.ticks_diff(warm_until[index], now) > 0
+            ):
+                speed = min_cold_start_duty
+            else:
+                state = FAN_RUNNING
+
+            if state == FAN_WARMING:
+                num_warming += 1
+
+            if duty_cycles[index] != speed:
+                pwm_pin.duty_u16(speed)
+                duty_cycles[index] = speed
+
+            fan_states[index] = state
+
+        self._num_warming = num_warming
+
+        return self._target_counts[step], duty_cycles
@@ -2,14 +2,15 @@
 Constants related to physical fans
 """
 
-
 try:
     from collections import namedtuple
 except ImportError:
     # we're probably on the pico if this occurs.
     from ucollections import namedtuple  # type: ignore
 
-MAX_DUTY = 65_025  # Per Raspberry Pi Pico Docs
+from micropython import const
+
+MAX_DUTY = const(65_025)  # Per Raspberry Pi Pico Docs
 
 FanConstants = namedtuple(
     "FanConstants",
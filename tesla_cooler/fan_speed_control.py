@@ -2,6 +2,7 @@
 Code for controlling fan speed!
 TODO - more docs
 """
+
 from tesla_cooler.linear_interpolate import linterp_int
 
 try:
@@ -15,32 +16,43 @@ from tesla_cooler import pure_python_itertools
 COOLER_POWER_MIN, COOLER_POWER_MAX = (0.0, 1.0)
 
 
-def _weigh_values(values: Tuple[int, ...], range_to_weight: Dict[Tuple[int, int], int]) -> int:
+def _range_weights(output_ranges: Tuple[Tuple[int, int], ...]) -> Tuple[Tuple[int, int, int], ...]:
     """
-    For each of the values in `values`, look up it's weight in `range_to_weight`, the return
-    the cumulative sum of all of weights in `values`.
+    Pair each of the output ranges with its weight, so weighing values later is just a scan over a
+    tuple. Each subsequent range is ^3 as expensive to use as the previous one.
+    This encodes the behavior that two fans spinning slowly are better than a single
+    fan spinning quickly.
+    :param output_ranges: The ranges of values, cheapest first. Both sides of each bound is
+    inclusive! For example, If the value 15 is weighed against the ranges ((10, 20), (21, 30)), it's
+    weight will be 1.
+    :return: A tuple of (range min, range max, weight) for each range.
+    """
+    return tuple(
+        (scope_min, scope_max, (scope_index + 1) ** 3)
+        for scope_index, (scope_min, scope_max) in enumerate(output_ranges)
+    )
+
 
-    Note: If a value in `values` is zero, it's resulting weight will be zero.
+def _weigh_values(values: Tuple[int, ...], range_weights: Tuple[Tuple[int, int, int], ...]) -> int:
+    """
+    For each of the values in `values`, find it's weight in `range_weights`, the return
+    the cumulative sum of all of weights in `values`.
+    Note: Zero always has a weight of zero, as do values that aren't in any of the ranges.
     :param values: Values to weigh.
-    :param range_to_weight: A dictionary that maps possible ranges of `value` to their corresponding
-    weights. Both sides of each bound is inclusive! For example, If the value 15 is weighed in the
-    following dictionary, it's weight will be 1:
-    {
-        (10, 20): 1,
-        (21, 30): 2,
-    }
+    :param range_weights: The ranges and their weights, see `_range_weights`.
     :return: The total weight of `values`.
     """
-    return sum(
-        filter(
-            lambda weight: weight is not None,
-            [
-                0 if value == 0 else (weight if scope_min <= value <= scope_max else None)
-                for (scope_min, scope_max), weight in range_to_weight.items()
-                for value in values
-            ],
-        )
-    )
+
+    total = 0
+
+    for value in values:
+        if value:
+            for scope_min, scope_max, weight in range_weights:
+                if scope_min <= value <= scope_max:
+                    total += weight
+                    break
+
+    return total
 
 
 def _combinations_to_sum(  # pylint: disable=unused-argument
@@ -55,9 +67,10 @@ def _combinations_to_sum(  # pylint: disable=unused-argument
     * https://en.wikipedia.org/wiki/Partition_(number_theory)
     * https://en.wikipedia.org/wiki/Subset_sum_problem
 
-    This approach is EXTREMELY NAIVE! No attempts to optimize performance have been made.
-    Instead of speeding this up, `potential_values` is is typically short in length and `tolerance`
-    is used to make sure the resulting set is representative.
+    This is a reference helper that is only used by the tests, fan speeds are chosen by
+    `_quietest_speeds`. This approach is EXTREMELY NAIVE! Every combination is enumerated and
+    summed, so the work grows very quickly with `target_length`. Keep `potential_values` short and
+    use `tolerance` to make sure the resulting set is representative.
 
     :param potential_values: Complete list of candidate values to add together to make
     `target_value`.
@@ -81,63 +94,140 @@ def _combinations_to_sum(  # pylint: disable=unused-argument
         """
 
         if len(tup) < target_length:
-            return (tup + pad)[:target_length]
+            return tup + pad[len(tup) :]
         else:
             return tup
 
-    all_valid = list(
-        pure_python_itertools.chain_from_iterable(
-            [
-                [
-                    pad_to_target_length(combo)
-                    for combo in pure_python_itertools.combinations_with_replacement(
-                        potential_values, sub_length + 1
-                    )
-                    if target_min <= sum(combo) <= target_max
-                ]
-                for sub_length in range(target_length)
-            ]
-        )
-    )
+    all_valid = set()
 
-    sorted_valid = [tuple(sorted(combo)) for combo in all_valid]
+    for sub_length in range(target_length):
+        for combo in pure_python_itertools.combinations_with_replacement(
+            potential_values, sub_length + 1
+        ):
+            if target_min <= sum(combo) <= target_max:
+                # Sorted so that different orderings of the same values are only kept once.
+                all_valid.add(tuple(sorted(pad_to_target_length(combo))))
 
-    return list(set(sorted_valid))
+    return list(all_valid)
 
 
 def _ranges_to_stats(output_ranges: Tuple[Tuple[int, int], ...]) -> Tuple[int, int]:
     """
     Compute some statistics about the output ranges.
-    :param output_ranges: Ranges to find stats for.
-    :return: (all values in the ranges, min value of ranges, max value of ranges)
+    :param output_ranges: Ranges to find stats for, sorted slowest to fastest.
+    :return: (min value of ranges, max value of ranges)
     """
-    all_values = list(pure_python_itertools.chain_from_iterable(output_ranges))
-    return min(all_values), max(all_values)
+    return output_ranges[0][0], output_ranges[-1][1]
+
 
+def _spread_counts(target_counts: int, speed_ranges: Tuple[Tuple[int, int], ...]) -> List[int]:
+    """
+    Split `target_counts` between fans as evenly as possible, keeping each fan within its range.
+    All of the fans are brought up to a common speed (the "water level"), fans whose range stops
+    below that level stay at the top of their range and fans whose range starts above that level
+    stay at the bottom of their range. Any counts left over from rounding are handed out one at a
+    time.
+    If `target_counts` can't be reached within the ranges, the fans are left at the nearest end of
+    their ranges.
+    :param target_counts: The sum of the speeds to produce.
+    :param speed_ranges: The (min, max) speed of each of the fans.
+    :return: The speed of each fan, in the same order as `speed_ranges`.
+    """
+
+    def level_total(level: int) -> int:
+        """
+        :param level: Common speed to bring the fans to.
+        :return: The sum of the speeds of the fans at this level.
+        """
+        return sum(max(range_min, min(range_max, level)) for range_min, range_max in speed_ranges)
+
+    # Binary search for the highest level that doesn't overshoot.
+    low = 0
+    high = max(range_max for _, range_max in speed_ranges)
+    while low < high:
+        middle = (low + high + 1) >> 1
+        if level_total(middle) <= target_counts:
+            low = middle
+        else:
+            high = middle - 1
 
-def fan_drive_values(  # pylint: disable=too-many-locals
+    speeds = [max(range_min, min(range_max, low)) for range_min, range_max in speed_ranges]
+    remaining = target_counts - sum(speeds)
+
+    for index, (range_min, range_max) in enumerate(speed_ranges):
+        if remaining <= 0:
+            break
+        if range_min <= low < range_max:
+            speeds[index] += 1
+            remaining -= 1
+
+    return speeds
+
+
+def _quietest_speeds(
+    target_counts: int, num_fans: int, output_ranges: Tuple[Tuple[int, int], ...]
+) -> Tuple[int, ...]:
+    """
+    Find the quietest set of fan speeds that add up to `target_counts`.
+    Every way of putting between one and `num_fans` fans into `output_ranges` is checked, and the
+    one with the lowest total weight (see `_range_weights`) that can add up to `target_counts` is
+    picked. There are only a handful of ranges and fans, so this is fast enough to do when the
+    fans are set up. The counts are then spread as evenly as possible between the fans that are
+    on, see `_spread_counts`.
+    If no set of ranges can add up to `target_counts` the set that gets closest is used.
+    :param target_counts: The sum of the speeds to produce.
+    :param num_fans: The number of fans to compute speeds for.
+    :param output_ranges: The different duty cycle ranges that an individual fan can spin at,
+    cheapest (slowest) first.
+    :return: A tuple of `num_fans` speeds sorted slowest to fastest, fans that are off are zero.
+    """
+
+    range_weights = _range_weights(output_ranges)
+
+    best_key: Tuple[int, int] = (0, 0)
+    best_ranges: Tuple[Tuple[int, int, int], ...] = ()
+
+    for fans_on in range(1, num_fans + 1):
+        for combo in pure_python_itertools.combinations_with_replacement(range_weights, fans_on):
+            counts_min = sum(range_min for range_min, _, _ in combo)
+            counts_max = sum(range_max for _, range_max, _ in combo)
+            # How far `target_counts` is from being reachable, then how loud the fans are.
+            key = (
+                max(0, counts_min - target_counts, target_counts - counts_max),
+                sum(weight for _, _, weight in combo),
+            )
+            if not best_ranges or key < best_key:
+                best_key = key
+                best_ranges = combo
+
+    speeds = _spread_counts(
+        target_counts=target_counts,
+        speed_ranges=tuple((range_min, range_max) for range_min, range_max, _ in best_ranges),
+    )
+
+    return tuple(sorted(speeds + [0] * (num_fans - len(speeds))))
+
+
+def fan_drive_values(
     power: float,
     num_fans: int,
     output_ranges: Tuple[Tuple[int, int], ...],
-    num_speeds: int,
     power_min: float = COOLER_POWER_MIN,
     power_max: float = COOLER_POWER_MAX,
 ) -> Tuple[int, Tuple[int, ...]]:
     """
     For a given power (which is by default a float between 0..1), come up with duty cycles for the
     fans that blow at the required power but do it as quietly as possible. The power is converted
-    to a sum of duty cycles. This sum is then achieved across the number of fans.
-    TODO: This is a complicated function, probably needs better docs.
+    to a sum of duty cycles. This sum is then achieved across the number of fans, see
+    `_quietest_speeds` for how.
     :param power: How strong the fans should be blowing.
     :param num_fans: The number of fans to compute duty cycles for.
     :param output_ranges: The different duty cycle ranges that an individual fan can spin at.
-    :param num_speeds: Number of possible choices that each fan can spin at to achieve the given
-    input power.
     :param power_min: Min value of `power`. If `power` is this value, a single fan will be spinning
     as slowly as possible.
     :param power_max: Max value of `power`. If `power` is this value, all three fans will be
     spinning as quickly as possible.
-    :return: A tuple of duty cycles to write to fans.
+    :return: The target sum of duty cycles, and a tuple of duty cycles to write to fans.
     """
     min_output, max_output = _ranges_to_stats(output_ranges)
 
@@ -157,41 +247,6 @@ def fan_drive_values(  # pylint: disable=too-many-locals
         out_max=all_fans_max_output,
     )
 
-    step = (max_output - min_output) // num_speeds
-
-    # This makes the following call to `_combinations_to_sum` easier to compute by limiting
-    # the number of inputs to make the combinations.
-    speeds = tuple(range(min_output, max_output, step))
-
-    # TODO -- need to think of a better way to approach this
-    # Increases the tolerance until we get at least a single set of speed values.
-    for multiplier in range(1, 10):
-
-        # Combinations of fan speeds that add up to `target_counts`.
-        candidate_speeds: List[Tuple[int, ...]] = _combinations_to_sum(
-            potential_values=speeds,
-            target_length=num_fans,
-            target_value=target_counts,
-            tolerance=step * multiplier,
-        )
-
-        if len(candidate_speeds) > 0:
-            break
-    else:
-        # Turn fans on full blast if the above compute fails.
-        candidate_speeds = [tuple(max_output for _ in range(num_fans))]
-
-    # Each subsequent range is ^3 as expensive to use as the previous one.
-    # This encodes the behavior that two fans spinning slowly are better than a single
-    # fan spinning quickly.
-    scope_to_weight = {
-        scope: (scope_index + 1) ** 3 for scope_index, scope in enumerate(output_ranges)
-    }
-
-    weights_and_speeds = [
-        (_weigh_values(values=speeds, range_to_weight=scope_to_weight), speeds)
-        for speeds in candidate_speeds
-    ]
-
-    # Lowest weight here will be the slowest speed ie. the quietest.
-    return target_counts, min(weights_and_speeds, key=lambda ws: ws[0])[1]
+    return target_counts, _quietest_speeds(
+        target_counts=target_counts, num_fans=num_fans, output_ranges=output_ranges
+    )
@@ -5,6 +5,39 @@ Converts temperature to cooler power.
 from tesla_cooler import linear_interpolate
 from tesla_cooler.fan_speed_control import COOLER_POWER_MAX, COOLER_POWER_MIN
 
+try:
+    from typing import Callable, Tuple  # pylint: disable=unused-import
+except ImportError:
+    pass  # we're probably on the pico if this occurs.
+
+
+# The temperatures (degrees C) where the slope of the cooler power curve changes.
+DEFAULT_TEMPERATURE_BREAKPOINTS = (40.0, 70.0, 100.0)
+
+
+def cooler_power_curve(
+    cooler_power_min: float = COOLER_POWER_MIN,
+    cooler_power_max: float = COOLER_POWER_MAX,
+    temperature_breakpoints: Tuple[float, float, float] = DEFAULT_TEMPERATURE_BREAKPOINTS,
+) -> Callable[[float], float]:
+    """
+    Kind of like a fan curve, creates a function that converts temperature to cooler power.
+    It's up to the `CoolerFanManager` that consumes this value to convert this power to fan rotation
+    speed. It is assumed though that higher power = faster fans.
+    Below the first breakpoint the power is `cooler_power_min`, it then climbs to a third of
+    `cooler_power_max` at the second breakpoint and on to `cooler_power_max` at the third.
+    :param cooler_power_min: Min power value.
+    :param cooler_power_max: Max power value.
+    :param temperature_breakpoints: Temperatures where the slope of the curve changes, ascending.
+    :return: A function that takes the current temperature of the GPU as read by the thermistor,
+    and returns cooler power as a float between the given bounds. See `piecewise_linear`.
+    """
+
+    return linear_interpolate.piecewise_linear(
+        xs=temperature_breakpoints,
+        ys=(cooler_power_min, cooler_power_max / 3, cooler_power_max),
+    )
+
 
 def gpu_temperature_to_cooler_power(
     gpu_temperature: float,
@@ -12,34 +45,14 @@ def gpu_temperature_to_cooler_power(
     cooler_power_max: float = COOLER_POWER_MAX,
 ) -> float:
     """
-    Kind of like a fan curve, converts temperature to cooler power.
-    It's up to the `CoolerFanManager` that consumes this value to convert this power to fan rotation
-    speed. It is assumed though that higher power = faster fans.
-    TODO: Would love to be able to pass the temp bounds here as a config file or more formal data
-    structure.
+    Convert a single temperature to cooler power, see `cooler_power_curve`. Callers converting
+    many temperatures should create the curve once with `cooler_power_curve` instead.
     :param gpu_temperature: Current temperature of the GPU as read by the thermistor.
     :param cooler_power_min: Min power value.
     :param cooler_power_max: Max power value.
     :return: Cooler power as a float between the given bounds.
     """
 
-    if gpu_temperature < 40:
-        return cooler_power_min
-    elif 40 <= gpu_temperature < 70:
-        return linear_interpolate.linterp_float(
-            x=gpu_temperature,
-            in_min=40,
-            in_max=70,
-            out_min=cooler_power_min,
-            out_max=cooler_power_max / 3,
-        )
-    elif 70 <= gpu_temperature < 100:
-        return linear_interpolate.linterp_float(
-            x=gpu_temperature,
-            in_min=70,
-            in_max=100,
-            out_min=cooler_power_max / 3,
-            out_max=cooler_power_max,
-        )
-    else:
-        return cooler_power_max
+    return cooler_power_curve(cooler_power_min=cooler_power_min, cooler_power_max=cooler_power_max)(
+        gpu_temperature
+    )
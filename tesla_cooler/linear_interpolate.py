@@ -6,25 +6,11 @@ https://forum.micropython.org/viewtopic.php?f=2&t=7615
 """
 
 try:
-    from typing import Union  # pylint: disable=unused-import
+    from typing import Callable, List, Sequence, Tuple  # pylint: disable=unused-import
 except ImportError:
     pass  # we're probably on the pico if this occurs.
 
 
-def _clamp(
-    x: Union[int, float], out_min: Union[int, float], out_max: Union[int, float]
-) -> Union[int, float]:
-    """
-    Truncates x to the given bounds.
-    :param x: Value to truncate.
-    :param out_min: Lower bound.
-    :param out_max: Upper bound.
-    :return: Truncated value... or not.
-    """
-
-    return max(min(x, out_max), out_min)
-
-
 def linterp_int(x: float, in_min: float, in_max: float, out_min: int, out_max: int) -> int:
     """
     Output will be an int! Note output is truncated if outside of output bounds.
@@ -36,7 +22,13 @@ def linterp_int(x: float, in_min: float, in_max: float, out_min: int, out_max: i
     :return: Scaled value in the space between `out_min` and `out_max`.
     """
     raw = (x - in_min) * (out_max - out_min) // (in_max - in_min) + out_min
-    return int(_clamp(raw, out_min, out_max))
+
+    # Clamped inline, as a helper would cost an extra function call every time.
+    if raw < out_min:
+        return out_min
+    if raw > out_max:
+        return out_max
+    return int(raw)
 
 
 def linterp_float(x: float, in_min: float, in_max: float, out_min: float, out_max: float) -> float:
@@ -50,4 +42,108 @@ def linterp_float(x: float, in_min: float, in_max: float, out_min: float, out_ma
     :return: Scaled value in the space between `out_min` and `out_max`.
     """
     raw = (x - in_min) * (out_max - out_min) / (in_max - in_min) + out_min
-    return float(_clamp(raw, out_min, out_max))
+
+    # Clamped inline, as a helper would cost an extra function call every time.
+    if raw < out_min:
+        return float(out_min)
+    if raw > out_max:
+        return float(out_max)
+    return raw
+
+
+def sorted_position(x: float, xs: Sequence[float]) -> Tuple[int, float]:
+    """
+    Binary searches `xs` for the pair of neighboring points that surround `x`.
+    Note `x` is truncated to the first/last point if it is outside of `xs`.
+    :param x: Value to find.
+    :param xs: Points to search, must be sorted ascending and contain at least two points.
+    :return: A tuple, the index of the lower point of the pair, and how far between the pair `x`
+    is as a fraction between 0 and 1.
+    """
+
+    low = 0
+    high = len(xs) - 1
+
+    if x <= xs[low]:
+        return low, 0.0
+    if x >= xs[high]:
+        return high - 1, 1.0
+
+    while low < high - 1:
+        middle = (low + high) >> 1
+        if xs[middle] <= x:
+            low = middle
+        else:
+            high = middle
+
+    x_low = xs[low]
+    return low, (x - x_low) / (xs[high] - x_low)
+
+
+def interpolate_position(position: Tuple[int, float], ys: Sequence[float]) -> float:
+    """
+    Linearly interpolate between a pair of neighboring values in `ys`.
+    :param position: Where to interpolate, see `sorted_position`. Can be re-used across any number
+    of `ys` that are parallel to the searched points.
+    :param ys: Output points.
+    :return: Interpolated output value.
+    """
+
+    index, fraction = position
+    y_low = ys[index]
+    return float(y_low + fraction * (ys[index + 1] - y_low))
+
+
+def interpolate_sorted(x: float, xs: Sequence[float], ys: Sequence[float]) -> float:
+    """
+    Piecewise-linear lookup. Binary searches `xs` for the pair of points that surround `x`, then
+    linearly interpolates between the corresponding pair of values in `ys`.
+    Note output is truncated to the first/last value of `ys` if `x` is outside of `xs`.
+    :param x: Value to look up.
+    :param xs: Input points, must be sorted ascending.
+    :param ys: Output points, parallel to `xs`.
+    :return: Interpolated output value.
+    """
+
+    return interpolate_position(sorted_position(x, xs), ys)
+
+
+def piecewise_linear(xs: Sequence[float], ys: Sequence[float]) -> Callable[[float], float]:
+    """
+    Create a piecewise-linear function through the points (`xs[n]`, `ys[n]`). The slope and
+    intercept of each segment are computed here once, so the returned function only has to find
+    the segment and do a multiply and an add. Segments are scanned in order, which is the fastest
+    option for the handful of points this is used with.
+    Note output is truncated to the first/last value of `ys` if the input is outside of `xs`.
+    :param xs: Input points, must be sorted ascending and contain at least two points.
+    :param ys: Output points, parallel to `xs`.
+    :return: The function.
+    """
+
+    # (upper bound, slope, intercept) for each segment.
+    segment_list: List[Tuple[float, float, float]] = []
+    for index in range(len(xs) - 1):
+        slope = (ys[index + 1] - ys[index]) / (xs[index + 1] - xs[index])
+        segment_list.append((xs[index + 1], slope, ys[index] - slope * xs[index]))
+    segments = tuple(segment_list)
+
+    x_first = xs[0]
+    y_first = ys[0]
+    y_last = ys[-1]
+
+    def function(x: float) -> float:
+        """
+        :param x: Value to look up.
+        :return: Interpolated output value.
+        """
+
+        if x < x_first:
+            return y_first
+
+        for x_high, slope, intercept in segments:
+            if x < x_high:
+                return slope * x + intercept
+
+        return y_last
+
+    return function
@@ -2,8 +2,10 @@
 Hardware mappings.
 """
 
-COOLER_A_THERMISTOR = 26
-COOLER_B_THERMISTOR = 27
+from micropython import const
+
+COOLER_A_THERMISTOR = const(26)
+COOLER_B_THERMISTOR = const(27)
 COOLER_A_FAN_PINS = (1, 3, 5)
 COOLER_B_FAN_PINS = (7, 9, 11)
-RESISTANCE_OF_PULLDOWN = 10_000
+RESISTANCE_OF_PULLDOWN = const(10_000)
@@ -5,108 +5,147 @@ See schematic for more details.
 """
 
 import json
+from array import array
 
+import micropython
 from machine import ADC
+from micropython import const
 
 try:
-    from typing import Callable, Dict, List, Sequence, Union  # pylint: disable=unused-import
+    from typing import Callable, Dict, List, Tuple  # pylint: disable=unused-import
 except ImportError:
     pass  # we're probably on the pico if this occurs.
 
-from tesla_cooler.pure_python_itertools import float_mean
+from tesla_cooler.linear_interpolate import interpolate_sorted
 
-RESISTANCE_OF_PULLDOWN = 10_000
-U_16_MAX = 65535
+RESISTANCE_OF_PULLDOWN = const(10_000)
+U_16_MAX = const(65535)
 
 # Determined experimentally
-DEFAULT_THERMISTOR_SAMPLES = 10
+DEFAULT_THERMISTOR_SAMPLES = const(10)
 
 DEFAULT_JSON_PATH = "./tesla_cooler/10K_3950_NTC_temperature_lookup.json"
 
 
+@micropython.viper
+def _sum_adc_counts(read_u16, samples: int) -> int:  # type: ignore
+    """
+    Take `samples` readings from an ADC and add them together. Compiled to native code with
+    machine ints, the sum of the readings must fit in 31 bits.
+    :param read_u16: Bound `read_u16` method of the ADC to sample.
+    :param samples: The number of samples to take.
+    :return: The sum of the readings.
+    """
+
+    total = 0
+    for _ in range(samples):
+        total += int(read_u16())
+    return total
+
+
 def _thermistor_resistance(
     pin: ADC,
     pulldown_resistance: int = RESISTANCE_OF_PULLDOWN,
     vin_count: int = U_16_MAX,
     samples: int = DEFAULT_THERMISTOR_SAMPLES,
-) -> float:
+) -> int:
     """
     Compute the resistance of the thermistor at the given PIN.
+    The raw ADC counts are summed (a boxcar average) and converted to a resistance once, rather
+    than converting and storing every individual sample. Only integer math is used as the pico
+    has no FPU, for the default values `pulldown_resistance * vin_count` still fits in a small int.
     :param pin: The ADC interface that is associated with the pin connected to the thermistor.
     :param pulldown_resistance: The value of the pulldown resistor in ohms.
     :param vin_count: The ADC count (in the u16 number space) for V_in, the max value that could
     be read from the ADC.
     :param samples: The number of samples to take to average for the measurement.
-    :return: The resistance in Ohms as a float.
+    :return: The resistance in Ohms.
     """
-    return float_mean(
-        [
-            float((pulldown_resistance * (vin_count / pin.read_u16())) - pulldown_resistance)
-            for _ in range(samples)
-        ]
-    )
 
+    mean_count: int = _sum_adc_counts(pin.read_u16, samples) // samples
 
-def _closest_to_value(
-    value: float, list_of_values: Union[Sequence[int], Sequence[float]]
-) -> Union[int, float]:
-    """
-    Given a value, and a list of values, find the closest value in the list to the input.
-    :param value: Value to find in list.
-    :param list_of_values: Candidate output values.
-    :return: The value closest to `value` in `list_of_values`.
-    """
-    return list_of_values[
-        min(range(len(list_of_values)), key=lambda i: abs(list_of_values[i] - value))
-    ]
+    return (pulldown_resistance * vin_count) // mean_count - pulldown_resistance
 
 
 def read_resistance_to_temperature(
     lookup_json_path: str = DEFAULT_JSON_PATH,
-) -> Dict[float, float]:
+) -> "Tuple[array[float], array[float]]":
     """
     Reads a local json file that contains a series of keys mapping temperature to resistance.
     :param lookup_json_path: Path to the json file.
-    :return: The mapping as a dict.
+    :return: The mapping as two parallel arrays. The first contains resistances (sorted ascending),
+    the second contains the corresponding temperatures. Units are ohms and degrees Celsius.
     """
 
     with open(lookup_json_path) as f:
         lookup_dict: Dict[str, str] = json.load(f)
 
-        # Need to multiply by 1000 because file is in kOhm
-        resistance_to_temperature: Dict[float, float] = {
-            float(resistance_str) * 1000: float(temperature_str)
-            for temperature_str, resistance_str in lookup_dict.items()
-        }
+    # Need to multiply by 1000 because file is in kOhm
+    resistances_and_temperatures = sorted(
+        (float(resistance_str) * 1000, float(temperature_str))
+        for temperature_str, resistance_str in lookup_dict.items()
+    )
 
-    return resistance_to_temperature
+    return (
+        array("f", [resistance for resistance, _ in resistances_and_temperatures]),
+        array("f", [temperature for _, temperature in resistances_and_temperatures]),
+    )
 
 
-def thermistor_temperature(pin_number: int, resistance_to_temperature: Dict[float, float]) -> float:
+def thermistor_resistance(pin_number: int) -> Callable[[], int]:
     """
-    Read the temperature off of a thermistor attached the given pin.
+    Create a reader for the resistance of a thermistor attached the given pin.
     :param pin_number: The pin connected to the thermistor.
-    :param resistance_to_temperature: A dict mapping resistance values to their corresponding
-    temperature. Units are ohms and degrees Celsius.
+    :return: A function that when called returns the current resistance of the thermistor in ohms.
+    """
+
+    adc = ADC(pin_number)
+
+    def read_resistance() -> int:
+        """
+        Read the thermistor.
+        :return: The current resistance of the thermistor.
+        """
+        return _thermistor_resistance(adc)
+
+    return read_resistance
+
+
+def thermistor_temperature(
+    pin_number: int, resistance_to_temperature: "Tuple[array[float], array[float]]"
+) -> Callable[[], float]:
+    """
+    Create a reader for the temperature of a thermistor attached the given pin.
+    The ADC and the lookup are bound once here so reading the temperature is a single call with no
+    arguments.
+    :param pin_number: The pin connected to the thermistor.
+    :param resistance_to_temperature: Parallel arrays of sorted resistance values and their
+    corresponding temperatures, see `read_resistance_to_temperature`.
     :return: A function that when called returns the current temperature of the thermistor.
     """
 
-    return resistance_to_temperature[
-        _closest_to_value(
-            _thermistor_resistance(pin=ADC(pin_number)), list(resistance_to_temperature.keys())
-        )
-    ]
+    read_resistance = thermistor_resistance(pin_number)
+    resistances, temperatures = resistance_to_temperature
+
+    def read_temperature() -> float:
+        """
+        Read the thermistor and look up the corresponding temperature.
+        :return: The current temperature of the thermistor.
+        """
+        return interpolate_sorted(read_resistance(), resistances, temperatures)
+
+    return read_temperature
 
 
 def read_thermistor_temp_one_shot(thermistor_pin_number: int) -> float:
     """
     Read mapping from disk, and consume it to get the current temperature of the attached
     thermistor.
-    Note: this is inefficient because you throw away the mapping dict after use.
+    Note: this is inefficient because you throw away the mapping after use.
     :param thermistor_pin_number: Pin associated w/ thermistor.
     :return: Current temperature in degrees.
     """
 
     return thermistor_temperature(
         pin_number=thermistor_pin_number, resistance_to_temperature=read_resistance_to_temperature()
-    )
+    )()
@@ -0,0 +1,150 @@
+"""Tests for `cooler_fan_manager` module."""
+
+import importlib
+import sys
+from array import array
+from types import ModuleType
+from typing import TYPE_CHECKING, Tuple
+from unittest.mock import MagicMock
+
+from pytest_mock import MockerFixture
+
+if TYPE_CHECKING:
+    # Only imported for the annotations, the module has to be imported against the stubs.
+    from tesla_cooler.cooler_fan_manager import CoolerFanManager
+
+# Speeds for `power` of 0, 0.5 and 1 for the single fan under test, see `_make_manager`.
+STOPPED_SPEED = 0
+SLOW_SPEED = 300
+FAST_SPEED = 900
+
+MIN_COLD_START_DUTY = 500
+
+
+def _import_cooler_fan_manager(mocker: MockerFixture) -> Tuple[ModuleType, MagicMock]:
+    """
+    Import `cooler_fan_manager` with the pico-only modules stubbed out.
+    :param mocker: Used to stub the modules.
+    :return: The imported module, and the `utime` stub. The stub's `ticks_ms` returns
+    `utime.now`, which the tests set directly.
+    """
+
+    micropython = mocker.MagicMock()
+    micropython.const = lambda value: value
+    micropython.native = lambda function: function
+    micropython.viper = lambda function: function
+
+    utime = mocker.MagicMock()
+    utime.now = 0
+    utime.ticks_ms = lambda: utime.now
+    utime.ticks_add = lambda ticks, delta: ticks + delta
+    utime.ticks_diff = lambda ticks_1, ticks_2: ticks_1 - ticks_2
+
+    mocker.patch.dict(
+        sys.modules, {"machine": mocker.MagicMock(), "micropython": micropython, "utime": utime}
+    )
+
+    # Force a fresh import against the stubs, `sys.modules` is restored after the test.
+    for name in [name for name in sys.modules if name.startswith("tesla_cooler")]:
+        del sys.modules[name]
+
+    return importlib.import_module("tesla_cooler.cooler_fan_manager"), utime
+
+
+def _make_manager(module: ModuleType) -> "CoolerFanManager":
+    """
+    Create a manager for a single fan, with the precomputed speeds replaced so that powers of 0,
+    0.5 and 1 map to `STOPPED_SPEED`, `SLOW_SPEED` and `FAST_SPEED`.
+    :param module: The stubbed `cooler_fan_manager` module.
+    :return: The manager.
+    """
+
+    fan_constants = module.FanConstants(
+        pwm_freq=30_000,
+        duty_ranges=((100, 1000),),
+        min_cold_start_duty=MIN_COLD_START_DUTY,
+        min_duty=100,
+    )
+    manager: "CoolerFanManager" = module.CoolerFanManager(
+        pin_numbers=(0,), fan_constants=fan_constants, power_steps=2
+    )
+    manager._speeds = array(  # pylint: disable=protected-access
+        "H", [STOPPED_SPEED, SLOW_SPEED, FAST_SPEED]
+    )
+    return manager
+
+
+def test_power_cold_start_below_min_cold_start_duty(mocker: MockerFixture) -> None:
+    """
+    A stopped fan asked to spin slower than `min_cold_start_duty` is held there until
+    `COLD_START_MS` has passed, then drops to the requested speed.
+    :param mocker: Used to stub the pico-only modules.
+    :return: None
+    """
+
+    module, utime = _import_cooler_fan_manager(mocker)
+    manager = _make_manager(module)
+
+    _, duty_cycles = manager.power(0.5)
+    assert list(duty_cycles) == [MIN_COLD_START_DUTY]
+    assert manager.warming()
+
+    utime.now = module.COLD_START_MS - 1
+    _, duty_cycles = manager.power(0.5)
+    assert list(duty_cycles) == [MIN_COLD_START_DUTY]
+    assert manager.warming()
+
+    utime.now = module.COLD_START_MS
+    _, duty_cycles = manager.power(0.5)
+    assert list(duty_cycles) == [SLOW_SPEED]
+    assert not manager.warming()
+
+
+def test_power_above_min_cold_start_duty_while_warming(mocker: MockerFixture) -> None:
+    """
+    A warming fan that is asked to spin faster than `min_cold_start_duty` goes straight to the
+    requested speed, and stays there once the fan is asked to slow down again.
+    :param mocker: Used to stub the pico-only modules.
+    :return: None
+    """
+
+    module, utime = _import_cooler_fan_manager(mocker)
+    manager = _make_manager(module)
+
+    manager.power(0.5)
+    assert manager.warming()
+
+    utime.now = 1
+    _, duty_cycles = manager.power(1)
+    assert list(duty_cycles) == [FAST_SPEED]
+    assert not manager.warming()
+
+    utime.now = 2
+    _, duty_cycles = manager.power(0.5)
+    assert list(duty_cycles) == [SLOW_SPEED]
+    assert not manager.warming()
+
+
+def test_power_stop_resets_cold_start(mocker: MockerFixture) -> None:
+    """
+    Stopping a fan means it has to be cold started again the next time it is asked to spin slower
+    than `min_cold_start_duty`.
+    :param mocker: Used to stub the pico-only modules.
+    :return: None
+    """
+
+    module, utime = _import_cooler_fan_manager(mocker)
+    manager = _make_manager(module)
+
+    manager.power(1)
+    assert not manager.warming()
+
+    utime.now = 1
+    _, duty_cycles = manager.power(0)
+    assert list(duty_cycles) == [STOPPED_SPEED]
+    assert not manager.warming()
+
+    utime.now = 2
+    _, duty_cycles = manager.power(0.5)
+    assert list(duty_cycles) == [MIN_COLD_START_DUTY]
+    assert manager.warming()
@@ -2,71 +2,46 @@
 Makes sure the helper functions work in a range of cases.
 """
 
-from typing import Dict, List, Tuple
+import itertools
+from typing import List, Tuple
 
 import pytest
 
 from tesla_cooler import fan_speed_control
 
-SIMPLE_WEIGHTS = {
-    (1, 5): 1,
-    (6, 10): 2,
-}
+# Values in the first range weigh 1, values in the second weigh 2**3.
+SIMPLE_RANGES = ((1, 5), (6, 10))
+
+# Uneven widths, so using a fan in an expensive range can beat filling the middle one.
+UNEVEN_RANGES = ((1, 5), (6, 8), (9, 30), (31, 40))
 
 
 @pytest.mark.parametrize(
-    "values,range_to_weight,expected_result",
+    "values,expected_result",
     [
-        (
-            (5,),
-            SIMPLE_WEIGHTS,
-            1,
-        ),
-        (
-            (10,),
-            SIMPLE_WEIGHTS,
-            2,
-        ),
-        (
-            (10, 10),
-            SIMPLE_WEIGHTS,
-            4,
-        ),
-        (
-            (1, 8),
-            SIMPLE_WEIGHTS,
-            3,
-        ),
-        (
-            (5, 10),
-            SIMPLE_WEIGHTS,
-            3,
-        ),
-        (
-            (5, 10, 0),
-            SIMPLE_WEIGHTS,
-            3,
-        ),
-        (
-            (0,),  # zero weight is hardcoded in function.
-            SIMPLE_WEIGHTS,
-            0,
-        ),
+        ((5,), 1),
+        ((10,), 8),
+        ((10, 10), 16),
+        ((1, 8), 9),
+        ((5, 10), 9),
+        ((5, 10, 0), 9),
+        ((0,), 0),  # zero weight is hardcoded in function.
+        ((11,), 0),  # out of all ranges.
     ],
 )
-def test__weigh_values(
-    values: Tuple[int, ...], range_to_weight: Dict[Tuple[int, int], int], expected_result: int
-) -> None:
+def test__weigh_values(values: Tuple[int, ...], expected_result: int) -> None:
     """
     Makes sure the weighing process works as expected.
     :param values: Input.
-    :param range_to_weight: Input.
     :param expected_result: Expected output of function under test.
     :return: None
     """
+    range_weights = fan_speed_control._range_weights(  # pylint: disable=protected-access
+        output_ranges=SIMPLE_RANGES
+    )
     assert (
         fan_speed_control._weigh_values(  # pylint: disable=protected-access
-            values=values, range_to_weight=range_to_weight
+            values=values, range_weights=range_weights
         )
         == expected_result
     )
@@ -148,3 +123,83 @@ def test__combinations_to_sum(
 
     assert len(combinations) == len(expected_result)
     assert set(combinations) == {tuple(sorted(combo)) for combo in expected_result}
+
+
+@pytest.mark.parametrize(
+    "target_counts,num_fans,expected_result",
+    [
+        (3, 3, (0, 0, 3)),  # A single fan in the cheapest range.
+        (1, 3, (0, 0, 1)),  # Below the cheapest range, a single fan as slowly as possible.
+        (8, 3, (0, 4, 4)),  # A second fan is turned on before any fan speeds up past 5.
+        (6, 1, (6,)),  # Only one fan, so it has to move up a range.
+        (14, 3, (4, 5, 5)),  # Every fan is in the cheapest range before any fan moves up.
+        (16, 3, (5, 5, 6)),  # Only one fan moves up a range.
+        (30, 3, (10, 10, 10)),
+    ],
+)
+def test__quietest_speeds(
+    target_counts: int, num_fans: int, expected_result: Tuple[int, ...]
+) -> None:
+    """
+    Checks that the cheapest ranges are used, and that speeds are spread evenly.
+    :param target_counts: Input.
+    :param num_fans: Input.
+    :param expected_result: Expected output of function under test.
+    :return: None
+    """
+    assert (
+        fan_speed_control._quietest_speeds(  # pylint: disable=protected-access
+            target_counts=target_counts, num_fans=num_fans, output_ranges=SIMPLE_RANGES
+        )
+        == expected_result
+    )
+
+
+@pytest.mark.parametrize("num_fans", [1, 2, 3])
+def test__quietest_speeds_minimum_weight(num_fans: int) -> None:
+    """
+    For every reachable target, the result should add up to the target and weigh the same as the
+    lightest set of ranges that can add up to the target, found by brute force.
+    :param num_fans: Input.
+    :return: None
+    """
+
+    range_weights = fan_speed_control._range_weights(  # pylint: disable=protected-access
+        output_ranges=UNEVEN_RANGES
+    )
+
+    for target_counts in range(1, UNEVEN_RANGES[-1][1] * num_fans + 1):
+        lightest = min(
+            sum(weight for _, _, weight in combo)
+            for fans_on in range(1, num_fans + 1)
+            for combo in itertools.combinations_with_replacement(range_weights, fans_on)
+            if sum(low for low, _, _ in combo) <= target_counts <= sum(high for _, high, _ in combo)
+        )
+
+        speeds = fan_speed_control._quietest_speeds(  # pylint: disable=protected-access
+            target_counts=target_counts, num_fans=num_fans, output_ranges=UNEVEN_RANGES
+        )
+
+        assert sum(speeds) == target_counts
+        assert (
+            fan_speed_control._weigh_values(  # pylint: disable=protected-access
+                values=speeds, range_weights=range_weights
+            )
+            == lightest
+        )
+
+
+@pytest.mark.parametrize("power", [0, 0.1, 0.33, 0.5, 0.9, 1])
+def test_fan_drive_values(power: float) -> None:
+    """
+    The speeds should be valid for the fans, and add up to the target.
+    :param power: Input.
+    :return: None
+    """
+    target_counts, speeds = fan_speed_control.fan_drive_values(
+        power=power, num_fans=3, output_ranges=SIMPLE_RANGES
+    )
+
+    assert len(speeds) == 3
+    assert sum(speeds) == target_counts
+    assert all(speed == 0 or 1 <= speed <= 10 for speed in speeds)
@@ -0,0 +1,34 @@
+"""
+Makes sure the cooler power curve matches the piecewise definition.
+"""
+
+import pytest
+
+from tesla_cooler import linear_interpolate
+from tesla_cooler.gpu_temperature_to_cooler_power import (
+    cooler_power_curve,
+    gpu_temperature_to_cooler_power,
+)
+
+
+@pytest.mark.parametrize(
+    "gpu_temperature", [0, 39.9, 40, 41.5, 55, 69.9, 70, 85.25, 99.9, 100, 120]
+)
+def test_cooler_power_curve(gpu_temperature: float) -> None:
+    """
+    The precomputed segments should agree with interpolating each segment directly.
+    :param gpu_temperature: Input.
+    :return: None
+    """
+
+    if gpu_temperature < 40:
+        expected = 0.0
+    elif gpu_temperature < 70:
+        expected = linear_interpolate.linterp_float(gpu_temperature, 40, 70, 0, 1 / 3)
+    elif gpu_temperature < 100:
+        expected = linear_interpolate.linterp_float(gpu_temperature, 70, 100, 1 / 3, 1)
+    else:
+        expected = 1.0
+
+    assert cooler_power_curve()(gpu_temperature) == pytest.approx(expected)
+    assert gpu_temperature_to_cooler_power(gpu_temperature) == pytest.approx(expected)
@@ -31,3 +31,53 @@ def test_linterp_float() -> None:
     assert linear_interpolate.linterp_float(0, 0, 1, 0, 3) == 0
     assert linear_interpolate.linterp_float(2, 0, 1, 0, 3) == 3
     assert linear_interpolate.linterp_float(-1, 0, 1, 0, 3) == 0
+
+
+def test_sorted_position() -> None:
+    """
+    Checks the bracketing pair and fraction, including at the ends.
+    :return: None
+    """
+
+    xs = (1.0, 2.0, 4.0, 8.0)
+
+    assert linear_interpolate.sorted_position(1, xs) == (0, 0)
+    assert linear_interpolate.sorted_position(3, xs) == (1, 0.5)
+    assert linear_interpolate.sorted_position(4, xs) == (2, 0)
+    assert linear_interpolate.sorted_position(8, xs) == (2, 1)
+    assert linear_interpolate.sorted_position(0, xs) == (0, 0)
+    assert linear_interpolate.sorted_position(9, xs) == (2, 1)
+
+
+def test_interpolate_sorted() -> None:
+    """
+    Checks exact hits, values between points, descending outputs and that the ends truncate.
+    :return: None
+    """
+
+    xs = (1.0, 2.0, 4.0, 8.0)
+    ys = (40.0, 30.0, 20.0, 10.0)
+
+    assert linear_interpolate.interpolate_sorted(2, xs, ys) == 30
+    assert linear_interpolate.interpolate_sorted(3, xs, ys) == 25
+    assert linear_interpolate.interpolate_sorted(7, xs, ys) == 12.5
+    assert linear_interpolate.interpolate_sorted(8, xs, ys) == 10
+    assert linear_interpolate.interpolate_sorted(0, xs, ys) == 40
+    assert linear_interpolate.interpolate_sorted(9, xs, ys) == 10
+
+
+def test_piecewise_linear() -> None:
+    """
+    Checks each segment, the breakpoints, and the truncation at the ends.
+    :return: None
+    """
+
+    function = linear_interpolate.piecewise_linear((0, 10, 20), (0, 1, 5))
+
+    assert function(-1) == 0
+    assert function(0) == 0
+    assert function(5) == 0.5
+    assert function(10) == 1
+    assert function(15) == 3
+    assert function(20) == 5
+    assert function(25) == 5
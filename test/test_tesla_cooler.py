@@ -1,8 +1,87 @@
 """Tests for `tesla_cooler` package."""
 
+import importlib
+import sys
+from types import ModuleType
+from typing import Callable, List
+
+from pytest_mock import MockerFixture
+
 
 def test_main() -> None:
     """
     TODO: Test for the main entry point of tesla_cooler
     :return: None
     """
+
+
+def _import_main(mocker: MockerFixture) -> ModuleType:
+    """
+    Import `main.py` with the pico-only modules stubbed out.
+    :param mocker: Used to stub the modules.
+    :return: The imported module.
+    """
+
+    micropython = mocker.MagicMock()
+    micropython.const = lambda value: value
+    micropython.native = lambda function: function
+    micropython.viper = lambda function: function
+
+    mocker.patch.dict(
+        sys.modules,
+        {"machine": mocker.MagicMock(), "micropython": micropython, "utime": mocker.MagicMock()},
+    )
+
+    # Force a fresh import against the stubs, `sys.modules` is restored after the test.
+    for name in [name for name in sys.modules if name == "main" or name.startswith("tesla_cooler")]:
+        del sys.modules[name]
+
+    return importlib.import_module("main")
+
+
+def test_cooler_scheduler_failed_pass_not_carried_over(mocker: MockerFixture) -> None:
+    """
+    A cooler failing in one pass shouldn't count as updated in the next pass, even if it was the
+    last cooler in the pass that failed. The watchdog should only be fed after a pass where every
+    cooler was updated.
+    :param mocker: Used to stub the pico-only modules.
+    :return: None
+    """
+
+    main = _import_main(mocker)
+
+    # Which of the two coolers raise, for each of the passes.
+    failures = [(False, True), (True, False), (False, False)]
+    calls: List[int] = []
+
+    def make_tick(index: int) -> Callable[[object], None]:
+        """
+        :param index: Which cooler this is.
+        :return: A tick that fails according to `failures`.
+        """
+
+        def tick(_timer: object) -> None:
+            """
+            :param _timer: Unused.
+            :return: None
+            """
+            pass_number = len(calls) // 2
+            calls.append(index)
+            if failures[pass_number][index]:
+                raise RuntimeError("Cooler failed!")
+
+        return tick
+
+    coolers = tuple(mocker.MagicMock(tick=make_tick(index)) for index in range(2))
+    scheduler = main.CoolerScheduler(coolers=coolers)
+
+    fed_after_pass = []
+    for _ in failures:
+        for _ in coolers:
+            try:
+                scheduler.tick(None)
+            except RuntimeError:
+                pass
+        fed_after_pass.append(main.WDT.return_value.feed.call_count)
+
+    assert fed_after_pass == [0, 0, 1]
@@ -0,0 +1,29 @@
+#!/usr/bin/env bash
+
+# Pre-compile the `tesla_cooler` library into `.mpy` bytecode files in `./build/tesla_cooler`.
+# The pico then doesn't have to parse the source on import, which saves heap and boot time.
+# `main.py` is left as source, the pico will only run it as a `.py` file.
+#
+# Upload the result with:
+#   rshell -p /dev/ttyACM0 --buffer-size 512 -f upload_mpy.txt
+
+set -e
+
+DIR="$( cd "$( dirname "${BASH_SOURCE[0]}" )" >/dev/null 2>&1 && pwd )"
+
+cd ${DIR}/..
+source ./venv/bin/activate
+
+BUILD_DIR=./build/tesla_cooler
+
+rm -rf ${BUILD_DIR}
+mkdir -p ${BUILD_DIR}
+
+# `-march` is required because some functions use the native/viper code emitters.
+# `-O2` strips asserts and sets `__debug__` to False. Line numbers are kept for tracebacks.
+for source in ./tesla_cooler/*.py; do
+  mpy-cross -O2 -march=armv6m -o "${BUILD_DIR}/$(basename "${source%.py}").mpy" "${source}"
+done
+
+# Non-python assets still need to be uploaded alongside the compiled library.
+cp ./tesla_cooler/*.json ${BUILD_DIR}